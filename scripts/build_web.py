@@ -3,14 +3,36 @@
 
 from __future__ import annotations
 
+import argparse
+import base64
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
 import shutil
 import subprocess
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
 ROOT = Path(__file__).resolve().parent.parent
 TARGET_DIR = ROOT / "target" / "wasm32-unknown-unknown" / "wasm-release"
 RAW_WASM = TARGET_DIR / "scurve-web.wasm"
 DIST_DIR = ROOT / "dist"
+BUILD_STAMP = DIST_DIR / ".build-stamp"
+MANIFEST = DIST_DIR / "manifest.json"
+COMPRESSIBLE_SUFFIXES = {".wasm", ".js", ".html"}
+CONTENT_ENCODINGS = {".gz": "gzip", ".br": "br"}
+# From this release wasm-bindgen detects reference types from the module's
+# target features and deprecates the explicit flag.
+REFERENCE_TYPES_AUTODETECT_VERSION = (0, 2, 94)
 
 INDEX_HTML = """<!DOCTYPE html>
 <html>
@@ -58,10 +80,51 @@ FALLBACK_HTML = """<!DOCTYPE html>
 """
 
 
-def run_command(command: list[str]) -> None:
+@functools.lru_cache(maxsize=None)
+def _which(command: str) -> str | None:
+    """Look up `command` on PATH once per run."""
+    return shutil.which(command)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Build the production web bundle into ./dist."
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help="Optimize the wasm for speed (opt-level=3) instead of size.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-bundle dist/ even if it matches the current build.",
+    )
+    return parser.parse_args()
+
+
+def run_command(command: list[str], env: dict[str, str] | None = None) -> None:
     """Run a subprocess while streaming output."""
-    print(f"$ {' '.join(command)}")
-    subprocess.run(command, check=True, cwd=ROOT)
+    print(f"$ {' '.join(command)}", flush=True)
+    subprocess.run(command, check=True, cwd=ROOT, env=env)
+
+
+def preflight() -> dict[str, str]:
+    """Warn about missing post-build tools and prepare the cargo environment."""
+    if _which("wasm-bindgen") is None:
+        print(
+            "warning: wasm-bindgen not found; the build will only produce a "
+            "fallback bundle. Press Ctrl+C and run `uv run ./scripts/setup_web.py` "
+            "to install it."
+        )
+    if _which("wasm-opt") is None:
+        print("warning: wasm-opt not found; the wasm output will not be optimized.")
+
+    env = os.environ.copy()
+    jobs = os.cpu_count()
+    if jobs is not None:
+        env.setdefault("CARGO_BUILD_JOBS", str(jobs))
+    return env
 
 
 def ensure_raw_wasm_exists() -> None:
@@ -82,9 +145,12 @@ def human_size(num_bytes: int) -> str:
     return f"{amount:.1f} PB"
 
 
+def describe_size(name: str, size: int) -> str:
+    return f"{human_size(size)} \t{name}"
+
+
 def describe_file(path: Path) -> str:
-    size = human_size(path.stat().st_size)
-    return f"{size} \t{path.name}"
+    return describe_size(path.name, path.stat().st_size)
 
 
 def prepare_dist() -> None:
@@ -94,11 +160,35 @@ def prepare_dist() -> None:
     DIST_DIR.mkdir(parents=True, exist_ok=True)
 
 
+@functools.lru_cache(maxsize=None)
+def tool_version(command: str) -> str | None:
+    """Return the `--version` output of `command`, or None if it is missing."""
+    if _which(command) is None:
+        return None
+    result = subprocess.run(
+        [command, "--version"], capture_output=True, text=True, check=False
+    )
+    return result.stdout.strip()
+
+
+def wasm_bindgen_version() -> tuple[int, ...] | None:
+    """Return the installed wasm-bindgen CLI version, if it can be parsed."""
+    match = re.search(r"(\d+)\.(\d+)\.(\d+)", tool_version("wasm-bindgen") or "")
+    if match is None:
+        return None
+    return tuple(int(part) for part in match.groups())
+
+
 def run_wasm_bindgen() -> bool:
-    if shutil.which("wasm-bindgen") is None:
+    if _which("wasm-bindgen") is None:
         print("wasm-bindgen not found; creating fallback bundle.")
         return False
 
+    features = ["--weak-refs"]
+    version = wasm_bindgen_version()
+    if version is not None and version < REFERENCE_TYPES_AUTODETECT_VERSION:
+        features.append("--reference-types")
+
     print("Running wasm-bindgen (target=web, no TS) ...")
     run_command(
         [
@@ -106,6 +196,7 @@ def run_wasm_bindgen() -> bool:
             "--target",
             "web",
             "--no-typescript",
+            *features,
             "--out-dir",
             str(DIST_DIR),
             str(RAW_WASM),
@@ -114,67 +205,235 @@ def run_wasm_bindgen() -> bool:
     return True
 
 
-def maybe_optimize_wasm(bg_wasm: Path) -> None:
+def maybe_optimize_wasm(bg_wasm: Path, fast: bool) -> None:
     if not bg_wasm.exists():
         print("wasm-bindgen output missing; skipping wasm-opt.")
         return
 
-    if shutil.which("wasm-opt") is None:
+    if _which("wasm-opt") is None:
         print("wasm-opt not found; skipping additional optimization.")
         return
 
-    print("Optimizing wasm via wasm-opt -Oz ...")
-    run_command(["wasm-opt", "-Oz", "-o", str(bg_wasm), str(bg_wasm)])
+    level = "-O3" if fast else "-Oz"
+    print(f"Optimizing wasm via wasm-opt {level} --converge ...")
+    run_command(
+        [
+            "wasm-opt",
+            level,
+            "--converge",
+            "--strip-debug",
+            "--strip-producers",
+            "-o",
+            str(bg_wasm),
+            str(bg_wasm),
+        ]
+    )
 
 
 def write_index(html: str) -> None:
     DIST_DIR.joinpath("index.html").write_text(html, encoding="utf-8")
 
 
+def gzip_compress(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_compress(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+
+def write_compressed(
+    path: Path, data: bytes, suffix: str, compress: Callable[[bytes], bytes]
+) -> tuple[Path, bytes]:
+    target = path.with_name(path.name + suffix)
+    compressed = compress(data)
+    target.write_bytes(compressed)
+    return target, compressed
+
+
+def read_artifacts() -> dict[Path, bytes]:
+    """Read every bundle file once so later steps can share the bytes."""
+    return {
+        path: path.read_bytes()
+        for path in sorted(DIST_DIR.iterdir())
+        if path.is_file() and not path.name.startswith(".")
+    }
+
+
+def precompress_artifacts(artifacts: dict[Path, bytes]) -> dict[Path, bytes]:
+    """Write .gz (and .br, if brotli is installed) siblings for static hosts.
+
+    zlib and brotli release the GIL while compressing, so each artifact and
+    encoding is compressed on its own thread. Returns the written siblings
+    and their contents.
+    """
+    codecs: list[tuple[str, Callable[[bytes], bytes]]] = [(".gz", gzip_compress)]
+    if brotli is None:
+        print("brotli module not found; writing gzip siblings only.")
+    else:
+        codecs.append((".br", brotli_compress))
+
+    compressible = [
+        (path, data)
+        for path, data in artifacts.items()
+        if path.suffix in COMPRESSIBLE_SUFFIXES
+    ]
+    jobs = len(compressible) * len(codecs)
+    if jobs == 0:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(jobs, os.cpu_count() or 1)) as pool:
+        futures = [
+            pool.submit(write_compressed, path, data, suffix, compress)
+            for path, data in compressible
+            for suffix, compress in codecs
+        ]
+        return dict(future.result() for future in futures)
+
+
+def sha384_base64(data: bytes) -> str:
+    return base64.b64encode(hashlib.sha384(data).digest()).decode("ascii")
+
+
+def write_manifest(
+    artifacts: dict[Path, bytes], compressed: dict[Path, bytes]
+) -> bytes:
+    """Record size and SRI hash for each bundle file, with its encoded variants.
+
+    SRI is checked against the decoded body, so encoded siblings carry a plain
+    sha384 of their bytes instead of an `integrity` value. Returns the
+    manifest's bytes.
+    """
+    files = []
+    for path, data in sorted(artifacts.items()):
+        encodings = {}
+        for suffix, encoding in CONTENT_ENCODINGS.items():
+            sibling = path.with_name(path.name + suffix)
+            if sibling in compressed:
+                encoded = compressed[sibling]
+                encodings[encoding] = {
+                    "name": sibling.name,
+                    "size": len(encoded),
+                    "sha384": sha384_base64(encoded),
+                }
+        files.append(
+            {
+                "name": path.name,
+                "size": len(data),
+                "integrity": f"sha384-{sha384_base64(data)}",
+                "encodings": encodings,
+            }
+        )
+    manifest = (json.dumps({"files": files}, indent=2) + "\n").encode("utf-8")
+    MANIFEST.write_bytes(manifest)
+    return manifest
+
+
 def emit_fallback_bundle() -> None:
     shutil.copy2(RAW_WASM, DIST_DIR / "scurve-web.wasm")
     write_index(FALLBACK_HTML)
 
 
-def emit_production_bundle() -> None:
+def emit_production_bundle(fast: bool) -> None:
     bg_wasm = DIST_DIR / "scurve_web_bg.wasm"
-    maybe_optimize_wasm(bg_wasm)
+    maybe_optimize_wasm(bg_wasm, fast)
     write_index(INDEX_HTML)
 
 
-def main() -> None:
-    print("Building scurve-web (wasm-release)...")
-    run_command(
-        [
-            "cargo",
-            "build",
-            "--target",
-            "wasm32-unknown-unknown",
-            "--bin",
-            "scurve-web",
-            "--profile",
-            "wasm-release",
-        ]
-    )
+def cargo_build_command(fast: bool) -> list[str]:
+    command = [
+        "cargo",
+        "build",
+        "--target",
+        "wasm32-unknown-unknown",
+        "--bin",
+        "scurve-web",
+        "--profile",
+        "wasm-release",
+    ]
+    if fast:
+        command += ["--config", "profile.wasm-release.opt-level=3"]
+    return command
+
+
+def build_stamp(fast: bool) -> str:
+    """Identify the bundle inputs: the raw wasm, this script, the optimization
+    mode and the post-processing tools."""
+    digest = hashlib.blake2b(RAW_WASM.read_bytes()).hexdigest()
+    script = hashlib.blake2b(Path(__file__).read_bytes()).hexdigest()
+    tools = [
+        f"{tool}={_which(tool)} {tool_version(tool)}"
+        for tool in ("wasm-bindgen", "wasm-opt")
+    ]
+    lines = [
+        digest,
+        f"script={script}",
+        f"fast={fast}",
+        *tools,
+        f"brotli={brotli is not None}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def dist_is_current(stamp: str) -> bool:
+    if not (DIST_DIR / "index.html").is_file() or not BUILD_STAMP.is_file():
+        return False
+    return BUILD_STAMP.read_text(encoding="utf-8") == stamp
 
-    ensure_raw_wasm_exists()
-    size_info = describe_file(RAW_WASM)
-    print(f"WASM raw size:\n{size_info}")
 
+def dist_sizes() -> dict[str, int]:
+    return {
+        path.name: path.stat().st_size
+        for path in DIST_DIR.iterdir()
+        if path.is_file() and not path.name.startswith(".")
+    }
+
+
+def bundle_dist(stamp: str, fast: bool) -> dict[str, int]:
+    """Assemble dist/ and return the size of each file written."""
     print("Preparing dist/ directory...")
     prepare_dist()
 
     if run_wasm_bindgen():
-        emit_production_bundle()
+        emit_production_bundle(fast)
     else:
         emit_fallback_bundle()
 
+    artifacts = read_artifacts()
+    print("Pre-compressing artifacts...")
+    compressed = precompress_artifacts(artifacts)
+    manifest = write_manifest(artifacts, compressed)
+
+    BUILD_STAMP.write_text(stamp, encoding="utf-8")
+
+    sizes = {path.name: len(data) for path, data in (artifacts | compressed).items()}
+    sizes[MANIFEST.name] = len(manifest)
+    return sizes
+
+
+def main() -> None:
+    args = parse_args()
+    env = preflight()
+
+    mode = "speed" if args.fast else "size"
+    print(f"Building scurve-web (wasm-release, optimized for {mode})...")
+    run_command(cargo_build_command(args.fast), env)
+
+    ensure_raw_wasm_exists()
+    size_info = describe_file(RAW_WASM)
+    print(f"WASM raw size:\n{size_info}")
+
+    stamp = build_stamp(args.fast)
+    if not args.force and dist_is_current(stamp):
+        print("dist/ already matches this wasm build; skipping bundling.")
+        sizes = dist_sizes()
+    else:
+        sizes = bundle_dist(stamp, args.fast)
+
     print()
     print("Build complete. Deploy the contents of dist/ via any static web server.")
     print("Included artifacts:")
-    for path in sorted(DIST_DIR.iterdir()):
-        if path.is_file():
-            print(describe_file(path))
+    for name, size in sorted(sizes.items()):
+        print(describe_size(name, size))
     print()
     print("Next steps:")
     print(
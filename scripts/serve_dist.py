@@ -4,15 +4,22 @@
 from __future__ import annotations
 
 import argparse
+import email.utils
+import os
 import sys
 from contextlib import suppress
+from datetime import datetime, timezone
+from http import HTTPStatus
 from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
 from pathlib import Path
+from typing import BinaryIO
 
 ROOT = Path(__file__).resolve().parent.parent
 DIST_DIR = ROOT / "dist"
 HOST = "127.0.0.1"
 DEFAULT_PORT = 8000
+# Pre-compressed sibling suffixes written by build_web.py, in preference order.
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
 
 
 def parse_args() -> argparse.Namespace:
@@ -29,10 +36,123 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def accepted_encodings(header: str) -> set[str]:
+    """Parse an Accept-Encoding header into the set of acceptable codings."""
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        key, _, value = params.partition("=")
+        if key.strip().lower() == "q":
+            with suppress(ValueError):
+                quality = float(value)
+        if name.strip() and quality > 0:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
 class DistRequestHandler(SimpleHTTPRequestHandler):
+    # Explicit types so browsers can stream-compile the wasm module.
+    extensions_map = {
+        **SimpleHTTPRequestHandler.extensions_map,
+        ".wasm": "application/wasm",
+        ".js": "application/javascript",
+    }
+
+    # Set per request when the file has pre-compressed siblings, so that every
+    # representation of it (including identity and 304s) carries Vary.
+    vary_encoding = False
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(DIST_DIR), **kwargs)
 
+    def end_headers(self) -> None:
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Cross-Origin-Opener-Policy", "same-origin")
+        self.send_header("Cross-Origin-Embedder-Policy", "require-corp")
+        if self.vary_encoding:
+            self.send_header("Vary", "Accept-Encoding")
+        super().end_headers()
+
+    def send_head(self) -> BinaryIO | None:
+        self.vary_encoding = False
+        path = Path(self.translate_path(self.path))
+        # Path() drops a trailing slash, so only a directory may resolve to its
+        # index; anything else is left to the stdlib (404 for "file/").
+        if self.path.split("?", 1)[0].split("#", 1)[0].endswith("/"):
+            if not path.is_dir():
+                return super().send_head()
+            path = path / "index.html"
+        if not path.is_file():
+            return super().send_head()
+
+        siblings = [
+            (encoding, sibling)
+            for encoding, suffix in PRECOMPRESSED
+            if (sibling := path.with_name(path.name + suffix)).is_file()
+        ]
+        if not siblings:
+            return super().send_head()
+
+        self.vary_encoding = True
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        for encoding, sibling in siblings:
+            if encoding in accepted:
+                return self.send_precompressed(path, sibling, encoding)
+        return super().send_head()
+
+    def not_modified_since(self, mtime: float) -> bool:
+        """Mirror SimpleHTTPRequestHandler's If-Modified-Since check."""
+        if "If-Modified-Since" not in self.headers or "If-None-Match" in self.headers:
+            return False
+        header = self.headers["If-Modified-Since"]
+        try:
+            since = email.utils.parsedate_to_datetime(header)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        if since.tzinfo is not timezone.utc:
+            return False
+        modified = datetime.fromtimestamp(mtime, timezone.utc).replace(microsecond=0)
+        return modified <= since
+
+    def send_precompressed(
+        self, path: Path, sibling: Path, encoding: str
+    ) -> BinaryIO | None:
+        """Send headers for a pre-compressed sibling and return it for copying.
+
+        Freshness is judged by the original file, so both representations share
+        one Last-Modified value.
+        """
+        mtime = path.stat().st_mtime
+        if self.not_modified_since(mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.end_headers()
+            return None
+
+        source = sibling.open("rb")
+        try:
+            size = os.fstat(source.fileno()).st_size
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", self.guess_type(str(path)))
+            self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(size))
+            self.send_header("Last-Modified", self.date_time_string(mtime))
+            self.end_headers()
+        except BaseException:
+            source.close()
+            raise
+        return source
+
+    def copyfile(self, source, outputfile) -> None:
+        # `outputfile` is self.wfile, an unbuffered writer over this connection
+        # that has no sendfile(); headers are already on the wire, so sending
+        # on the socket directly keeps ordering. socket.sendfile uses the
+        # kernel's zero-copy path for regular files and falls back to plain
+        # sends for in-memory bodies such as listings.
+        self.connection.sendfile(source)
+
     def log_message(self, format: str, *args: object) -> None:  # noqa: A003
         sys.stdout.write(f"[{self.address_string()}] {format % args}\n")
         sys.stdout.flush()
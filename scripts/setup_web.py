@@ -3,17 +3,27 @@
 
 from __future__ import annotations
 
+import functools
 import shutil
 import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parent.parent
 
 REQUIRED_COMMANDS = ["rustup", "cargo"]
+CARGO_TOOLS = ["wasm-server-runner", "wasm-bindgen-cli"]
+
+
+@functools.lru_cache(maxsize=None)
+def _which(command: str) -> str | None:
+    """Look up `command` on PATH once per run."""
+    return shutil.which(command)
 
 
 def ensure_prereqs() -> None:
-    missing = [cmd for cmd in REQUIRED_COMMANDS if shutil.which(cmd) is None]
+    missing = [cmd for cmd in REQUIRED_COMMANDS if _which(cmd) is None]
     if missing:
         joined = ", ".join(missing)
         raise SystemExit(
@@ -21,20 +31,66 @@ def ensure_prereqs() -> None:
         )
 
 
-def run_command(command: list[str]) -> None:
-    print(f"$ {' '.join(command)}")
-    subprocess.run(command, check=True, cwd=ROOT)
+def tagged(text: str, tag: str | None) -> str:
+    """Prefix `text` with `[tag]` so concurrent output stays attributable."""
+    return text if tag is None else f"[{tag}] {text}"
+
+
+def run_command(command: list[str], tag: str | None = None) -> None:
+    """Run a subprocess while streaming output.
+
+    Without a tag the command inherits the terminal, keeping cargo's progress
+    display. With a tag, stdout and stderr are merged and each line is prefixed
+    with `[tag]` so output from concurrent commands stays legible.
+    """
+    print(tagged(f"$ {' '.join(command)}", tag), flush=True)
+    if tag is None:
+        subprocess.run(command, check=True, cwd=ROOT)
+        return
+
+    with subprocess.Popen(
+        command,
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+    ) as proc:
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            sys.stdout.write(tagged(line, tag))
+            sys.stdout.flush()
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, command)
+
+
+def install_cargo_tool(tool: str) -> None:
+    """Install a cargo tool, preferring prebuilt binaries via cargo-binstall."""
+    if _which("cargo-binstall") is not None:
+        try:
+            run_command(["cargo", "binstall", "--no-confirm", tool], tag=tool)
+            return
+        except subprocess.CalledProcessError:
+            message = "cargo binstall failed; falling back to cargo install."
+            print(tagged(message, tool), flush=True)
+    run_command(["cargo", "install", tool], tag=tool)
 
 
 def install_tools() -> None:
     print("Adding wasm32-unknown-unknown target...")
     run_command(["rustup", "target", "add", "wasm32-unknown-unknown"])
 
-    print("Installing wasm-server-runner...")
-    run_command(["cargo", "install", "wasm-server-runner"])
+    if _which("cargo-binstall") is None:
+        print(
+            "cargo-binstall not found; building tools from source. "
+            "Install cargo-binstall for faster prebuilt downloads."
+        )
 
-    print("Installing wasm-bindgen-cli...")
-    run_command(["cargo", "install", "wasm-bindgen-cli"])
+    print(f"Installing {', '.join(CARGO_TOOLS)} in parallel...")
+    with ThreadPoolExecutor(max_workers=len(CARGO_TOOLS)) as pool:
+        futures = [pool.submit(install_cargo_tool, tool) for tool in CARGO_TOOLS]
+        for future in futures:
+            future.result()
 
 
 def main() -> None: